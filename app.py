@@ -4,126 +4,483 @@ Patient Scheduler Web App (Excel version) with Search
 -----------------------------------------------------
 - Add, delete, list appointments
 - Search appointments by name
-- Auto save/load from appointments.xlsx
+- Auto save/load from a snapshot plus an append-only journal (appointments.jsonl)
 - Limit patients per hour
-- Download Excel file directly
+- Download Excel file directly (generated on demand)
 
 Requirements:
-  pip install flask openpyxl
+  pip install flask openpyxl orjson
 """
 
-from flask import Flask, request, jsonify, send_file, render_template_string
-from openpyxl import Workbook, load_workbook
-import os, uuid, tempfile
+from flask import Flask, request, send_file
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from xml.sax.saxutils import escape
+import orjson
+import io, os, gzip, json, mmap, uuid, queue, pickle, tempfile, threading, zipfile
+from collections import Counter, defaultdict
+from dataclasses import dataclass
 from datetime import datetime
 
 # ---------- CONFIG ----------
 EXCEL_FILE = "appointments.xlsx"
+APPTS_JOURNAL = "appointments.jsonl"
+SNAPSHOT_FILE = "appointments.snapshot"
 MAX_PER_HOUR = 4
 DATETIME_FORMAT = "%Y-%m-%dT%H:%M"
 # ----------------------------
 
 app = Flask(__name__)
-appointments = []
+appointments_by_id = {}  # id -> appointment, in insertion order
+name_index = defaultdict(set)  # lowercased name trigram -> appointment ids
+hour_counts = Counter()  # (year, month, day, hour) -> number of appointments
+mutation_version = 0  # bumped on every add/delete
+_xlsx_cache = {"version": -1, "bytes": None}
+_sorted_cache = {"version": -1, "items": []}
+_list_cache = {"version": -1, "body": b"", "gzip": b""}  # encoded GET /api/appointments
+BOOT_ID = uuid.uuid4().hex[:8]  # keeps ETags from a previous process from matching
+# Guards the in-memory store; reentrant so cache rebuilds can nest inside mutations
+write_lock = threading.RLock()
+_snapshot_lock = threading.Lock()  # one snapshot writer at a time
+_export_queue = queue.Queue()  # pending requests to refresh EXCEL_FILE
+uuid_pool = queue.Queue(maxsize=256)  # pre-drawn appointment ids
 HEADERS = ["id", "name", "address", "reason", "datetime", "created_at"]
+POST_FIELDS = ("name", "address", "reason", "datetime")
+
+@dataclass(slots=True)
+class Appt:
+    # Fields in HEADERS order, plus the parsed schedule cached as dt
+    id: str
+    name: str
+    address: str
+    reason: str
+    datetime: str
+    created_at: str
+    dt: datetime | None = None
+
+    @classmethod
+    def from_record(cls, rec):
+        return cls(*(rec.get(h, "") for h in HEADERS))
+
+    def row(self):
+        return (self.id, self.name, self.address, self.reason, self.datetime, self.created_at)
+
+# ---------- JOURNAL HELPERS ----------
+# State on disk is a snapshot (version + rows) plus the journal of mutations made
+# after it. Every journal record carries the version it produced, so records
+# already folded into the snapshot are skipped on replay.
+def _journal_append(record):
+    with open(APPTS_JOURNAL, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def _trim_journal(version):
+    # Keep only records newer than the given snapshot version; caller holds write_lock
+    kept = []
+    with open(APPTS_JOURNAL, encoding="utf-8") as f:
+        for line in f:
+            try:
+                if json.loads(line).get("v", 0) > version:
+                    kept.append(line)
+            except ValueError:
+                continue
+    tmp_fd, tmp_path = tempfile.mkstemp(prefix="appts-", suffix=".jsonl",
+                                        dir=os.path.dirname(os.path.abspath(APPTS_JOURNAL)))
+    with os.fdopen(tmp_fd, "w", encoding="utf-8") as f:
+        f.writelines(kept)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, APPTS_JOURNAL)
+
+def write_snapshot():
+    # Persist the whole store at the current version, then drop the journal
+    # records it covers. Only the row copy and the journal trim hold write_lock.
+    with _snapshot_lock:
+        with write_lock:
+            version = mutation_version
+            rows = [a.row() for a in appointments_by_id.values()]
+        payload = pickle.dumps((version, rows), protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_fd, tmp_path = tempfile.mkstemp(prefix="appts-", suffix=".snapshot",
+                                            dir=os.path.dirname(os.path.abspath(SNAPSHOT_FILE)))
+        with os.fdopen(tmp_fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, SNAPSHOT_FILE)
+        with write_lock:
+            if mutation_version == version:
+                # Everything in the journal is covered by the snapshot
+                with open(APPTS_JOURNAL, "w", encoding="utf-8"):
+                    pass
+            elif os.path.exists(APPTS_JOURNAL):
+                _trim_journal(version)
+
+def _read_snapshot():
+    if not os.path.exists(SNAPSHOT_FILE):
+        return -1, []
+    with open(SNAPSHOT_FILE, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return pickle.loads(mm)
+
+def load_journal():
+    global mutation_version
+    _reset_store()
+    snap_version, rows = _read_snapshot()
+    if snap_version < 0 and not os.path.exists(APPTS_JOURNAL):
+        # First start after switching to the journal: seed it from the Excel file
+        load_excel()
+        write_snapshot()
+        return
+    live = {row[0]: Appt(*row) for row in rows}
+    version = max(snap_version, 0)
+    replayed = False
+    if os.path.exists(APPTS_JOURNAL):
+        with open(APPTS_JOURNAL, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # A torn write from a crash; the snapshot below drops it
+                    replayed = True
+                    continue
+                # Records without "v" predate snapshots and are only replayed
+                # when no snapshot exists yet
+                rec_version = rec.get("v", 0)
+                if rec_version <= snap_version:
+                    continue
+                replayed = True
+                version = max(version, rec_version)
+                if rec.get("op") == "del":
+                    live.pop(rec.get("id"), None)
+                else:
+                    live[rec["id"]] = Appt.from_record(rec)
+    for appt in live.values():
+        _add_loaded(appt)
+    mutation_version = version
+    if replayed or snap_version < 0:
+        write_snapshot()
+# -------------------------------------
+
+# ---------- IN-MEMORY STORE ----------
+def _reset_store():
+    appointments_by_id.clear()
+    name_index.clear()
+    hour_counts.clear()
+    _xlsx_cache["version"] = -1
+    _sorted_cache["version"] = -1
+    _list_cache["version"] = -1
+
+def _trigrams(text):
+    text = str(text or "").lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _add_loaded(appt):
+    appt.dt = _parse_dt(appt.datetime)
+    _index_appt(appt)
+
+def _index_appt(appt):
+    appointments_by_id[appt.id] = appt
+    hour_counts[_hour_key(appt.dt)] += 1
+    for gram in _trigrams(appt.name):
+        name_index[gram].add(appt.id)
+
+def _unindex_appt(appt):
+    del appointments_by_id[appt.id]
+    hour_counts[_hour_key(appt.dt)] -= 1
+    for gram in _trigrams(appt.name):
+        ids = name_index.get(gram)
+        if ids is not None:
+            ids.discard(appt.id)
+            if not ids:
+                del name_index[gram]
+
+def sorted_appointments():
+    # Sorted view by schedule, rebuilt only when appointments changed
+    with write_lock:
+        if _sorted_cache["version"] != mutation_version:
+            _sorted_cache["items"] = sorted(appointments_by_id.values(), key=_sort_key)
+            _sorted_cache["version"] = mutation_version
+        return _sorted_cache["items"]
+
+def search_by_name(query):
+    # Case-insensitive substring match; the trigram index narrows the candidates
+    q = query.strip().lower()
+    if len(q) < 3:
+        candidates = appointments_by_id.values()
+    else:
+        sets = sorted((name_index.get(g, ()) for g in _trigrams(q)), key=len)
+        candidates = [appointments_by_id[i] for i in set(sets[0]).intersection(*sets[1:])]
+    return [a for a in candidates if q in str(a.name or "").lower()]
+# -------------------------------------
 
 # ---------- EXCEL HELPERS ----------
 def load_excel():
-    global appointments
-    appointments = []
+    _reset_store()
     if not os.path.exists(EXCEL_FILE):
         return
-    wb = load_workbook(EXCEL_FILE)
-    ws = wb.active
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if not row or not row[0]:
+    # read_only streams rows instead of building the whole sheet in memory
+    wb = load_workbook(EXCEL_FILE, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            if not row or not row[0] or row[0] in appointments_by_id:
+                continue
+            _add_loaded(Appt.from_record(dict(zip(HEADERS, row))))
+    finally:
+        # read-only workbooks keep the file handle open until closed
+        wb.close()
+
+# The xlsx package is a zip of XML parts. Everything except the sheet body is
+# constant, so we write it directly instead of going through openpyxl.
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Sheet" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_TAIL = '</sheetData></worksheet>'
+XLSX_COLUMNS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"[:len(HEADERS)]
+
+def _sheet_row(row_num, values):
+    # escape() only handles &, < and >; control characters XML 1.0 forbids are dropped
+    cells = []
+    for col, value in zip(XLSX_COLUMNS, values):
+        if value is None or value == "":
             continue
-        appt = dict(zip(HEADERS, row))
-        appointments.append(appt)
+        cells.append(f'<c r="{col}{row_num}" t="inlineStr"><is><t xml:space="preserve">'
+                     f'{escape(ILLEGAL_CHARACTERS_RE.sub("", str(value)))}</t></is></c>')
+    return f'<row r="{row_num}">{"".join(cells)}</row>'
+
+def _sheet_xml(rows):
+    parts = [XLSX_SHEET_HEAD, _sheet_row(1, HEADERS)]
+    for row_num, row in enumerate(rows, start=2):
+        parts.append(_sheet_row(row_num, row))
+    parts.append(XLSX_SHEET_TAIL)
+    return "".join(parts)
+
+def build_xlsx():
+    # Serialized workbook bytes, regenerated only when appointments changed.
+    # Only the row copy holds write_lock; building and compressing run outside it.
+    with write_lock:
+        version = mutation_version
+        if _xlsx_cache["version"] == version:
+            return _xlsx_cache["bytes"]
+        rows = [a.row() for a in appointments_by_id.values()]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+        zf.writestr("_rels/.rels", XLSX_ROOT_RELS)
+        zf.writestr("xl/workbook.xml", XLSX_WORKBOOK)
+        zf.writestr("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS)
+        zf.writestr("xl/worksheets/sheet1.xml", _sheet_xml(rows))
+    data = buf.getvalue()
+    with write_lock:
+        # Don't publish bytes that a mutation made stale while we were building
+        if mutation_version == version:
+            _xlsx_cache["version"] = version
+            _xlsx_cache["bytes"] = data
+    return data
 
 def save_excel():
-    wb = Workbook()
-    ws = wb.active
-    ws.append(HEADERS)
-    for a in appointments:
-        ws.append([a[h] for h in HEADERS])
-    tmp_fd, tmp_path = tempfile.mkstemp(prefix="appts-", suffix=".xlsx")
-    os.close(tmp_fd)
-    wb.save(tmp_path)
+    data = build_xlsx()
+    tmp_fd, tmp_path = tempfile.mkstemp(prefix="appts-", suffix=".xlsx",
+                                        dir=os.path.dirname(os.path.abspath(EXCEL_FILE)))
+    with os.fdopen(tmp_fd, "wb") as f:
+        f.write(data)
     os.replace(tmp_path, EXCEL_FILE)
 
-def count_in_hour(dt_iso):
-    try:
-        dt = datetime.fromisoformat(dt_iso)
-    except Exception:
-        return 0
-    count = 0
-    for a in appointments:
+def _export_worker():
+    # Keeps EXCEL_FILE and the snapshot in sync off the request path; a burst of
+    # mutations queued while a save is running collapses into a single rewrite.
+    while True:
+        _export_queue.get()
         try:
-            adt = datetime.fromisoformat(a["datetime"])
-            if (adt.year, adt.month, adt.day, adt.hour) == (dt.year, dt.month, dt.day, dt.hour):
-                count += 1
+            while True:
+                _export_queue.get_nowait()
+        except queue.Empty:
+            pass
+        # Separate so a failing xlsx export never stops snapshots / journal trimming
+        try:
+            save_excel()
         except Exception:
-            continue
-    return count
+            app.logger.exception("Failed to export %s", EXCEL_FILE)
+        try:
+            write_snapshot()
+        except Exception:
+            app.logger.exception("Failed to write %s", SNAPSHOT_FILE)
+
+def _parse_fixed(s):
+    # Fast path for the canonical DATETIME_FORMAT value sent by the form:
+    # slice out the fields instead of going through fromisoformat
+    # isdigit() alone also accepts non-ASCII digits such as "²", which int() rejects
+    if (isinstance(s, str) and len(s) == 16 and s.isascii() and s[4] == "-" and s[7] == "-" and s[10] == "T" and s[13] == ":"
+            and s[0:4].isdigit() and s[5:7].isdigit() and s[8:10].isdigit()
+            and s[11:13].isdigit() and s[14:16].isdigit()):
+        return (int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]))
+    return None
+
+def _parse_dt(value):
+    parts = _parse_fixed(value)
+    if parts is not None:
+        try:
+            return datetime(*parts)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+    # Keep every cached value naive (wall-clock time as entered) so sorting never
+    # mixes offset-aware and offset-naive datetimes
+    return value.replace(tzinfo=None)
+
+def _hour_key(dt):
+    if dt is None:
+        return None
+    return (dt.year, dt.month, dt.day, dt.hour)
+
+def _sort_key(appt):
+    return appt.dt or datetime.max
+
+def _public(appt):
+    # Plain dict of the HEADERS fields (no cached dt) for JSON and the journal
+    return dict(zip(HEADERS, appt.row()))
+
+def ojson(obj, status=200):
+    # orjson is a C encoder; much faster than jsonify for the full appointment list
+    return app.response_class(orjson.dumps(obj), status=status, mimetype="application/json")
+
+def _fill_uuid_pool():
+    # Draw ids ahead of time so POST doesn't hit os.urandom on the request path
+    while True:
+        uuid_pool.put(uuid.uuid4().hex)
+
+def _new_id():
+    try:
+        return uuid_pool.get_nowait()
+    except queue.Empty:
+        return uuid.uuid4().hex
 # -----------------------------------
 
 @app.route("/")
 def index():
-    return render_template_string(INDEX_HTML, max_per_hour=MAX_PER_HOUR)
+    return app.response_class(INDEX_RENDERED, mimetype="text/html")
 
 @app.route("/api/appointments", methods=["GET", "POST", "DELETE"])
 def api_appointments():
+    global mutation_version
     if request.method == "GET":
-        return jsonify({"ok": True, "appointments": sorted(appointments, key=lambda a: a["datetime"])})
+        with write_lock:
+            version = mutation_version
+            if _list_cache["version"] != version:
+                body = orjson.dumps({"ok": True, "appointments": [_public(a) for a in sorted_appointments()]})
+                _list_cache.update(version=version, body=body, gzip=gzip.compress(body, compresslevel=6))
+            body, gz = _list_cache["body"], _list_cache["gzip"]
+        etag = f"{BOOT_ID}-{version}"
+        if request.if_none_match.contains(etag):
+            resp = app.response_class(status=304)
+        elif request.accept_encodings["gzip"]:
+            # Quality lookup, so "gzip;q=0" counts as a refusal
+            resp = app.response_class(gz, mimetype="application/json")
+            resp.headers["Content-Encoding"] = "gzip"
+        else:
+            resp = app.response_class(body, mimetype="application/json")
+        resp.headers["Vary"] = "Accept-Encoding"
+        resp.set_etag(etag)
+        return resp
 
     if request.method == "POST":
         data = request.json or {}
-        name = data.get("name", "").strip()
-        address = data.get("address", "").strip()
-        reason = data.get("reason", "").strip()
-        dt = data.get("datetime", "").strip()
+        fields = tuple(str(data.get(k) or "").strip() for k in POST_FIELDS)
+        name, address, reason, dt = fields
 
         if not name or not dt:
-            return jsonify({"ok": False, "error": "Name and datetime are required."}), 400
+            return ojson({"ok": False, "error": "Name and datetime are required."}, 400)
 
+        # json.loads accepts lone surrogates, but orjson and the xlsx writer can't
+        # encode them; reject before anything is journaled
         try:
-            datetime.fromisoformat(dt)
-        except Exception:
-            return jsonify({"ok": False, "error": "Invalid datetime format."}), 400
-
-        if count_in_hour(dt) >= MAX_PER_HOUR:
-            return jsonify({"ok": False, "error": f"Hour full (max {MAX_PER_HOUR})."}), 409
-
-        new_appt = {
-            "id": str(uuid.uuid4()),
-            "name": name,
-            "address": address,
-            "reason": reason,
-            "datetime": dt,
-            "created_at": datetime.utcnow().isoformat()
-        }
-        appointments.append(new_appt)
-        save_excel()
-        return jsonify({"ok": True, "appointment": new_appt}), 201
+            "".join(fields).encode("utf-8")
+        except UnicodeEncodeError:
+            return ojson({"ok": False, "error": "Invalid characters in input."}, 400)
+
+        parsed = _parse_dt(dt)
+        if parsed is None:
+            return ojson({"ok": False, "error": "Invalid datetime format."}, 400)
+        key = _hour_key(parsed)
+
+        new_appt = Appt(_new_id(), name, address, reason, dt, datetime.utcnow().isoformat(), parsed)
+        with write_lock:
+            if hour_counts[key] >= MAX_PER_HOUR:
+                return ojson({"ok": False, "error": f"Hour full (max {MAX_PER_HOUR})."}, 409)
+            version = mutation_version + 1
+            _journal_append({**_public(new_appt), "v": version})
+            _index_appt(new_appt)
+            mutation_version = version
+        _export_queue.put(None)
+        return ojson({"ok": True, "appointment": _public(new_appt)}, 201)
 
     if request.method == "DELETE":
         data = request.json or {}
         appt_id = data.get("id")
-        before = len(appointments)
-        appointments[:] = [a for a in appointments if a["id"] != appt_id]
-        if len(appointments) == before:
-            return jsonify({"ok": False, "error": "Appointment not found"}), 404
-        save_excel()
-        return jsonify({"ok": True})
+        with write_lock:
+            # Non-string ids (e.g. a JSON list) can't match and aren't hashable
+            appt = appointments_by_id.get(appt_id) if isinstance(appt_id, str) else None
+            if appt is None:
+                return ojson({"ok": False, "error": "Appointment not found"}, 404)
+            version = mutation_version + 1
+            _journal_append({"op": "del", "id": appt_id, "v": version})
+            _unindex_appt(appt)
+            mutation_version = version
+        _export_queue.put(None)
+        return ojson({"ok": True})
+
+@app.route("/api/appointments/search")
+def search_appointments():
+    with write_lock:
+        matches = sorted(search_by_name(request.args.get("q", "")), key=_sort_key)
+    return ojson({"ok": True, "appointments": [_public(a) for a in matches]})
 
 @app.route("/download")
 def download_excel():
-    save_excel()
-    return send_file(EXCEL_FILE, as_attachment=True, download_name=EXCEL_FILE)
+    return send_file(io.BytesIO(build_xlsx()), as_attachment=True, download_name=EXCEL_FILE,
+                     mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
 # Load at startup
-load_excel()
+load_journal()
+threading.Thread(target=_export_worker, name="xlsx-export", daemon=True).start()
+threading.Thread(target=_fill_uuid_pool, name="uuid-pool", daemon=True).start()
 
 # ---------- HTML (UI with Search) ----------
 INDEX_HTML = """
@@ -186,7 +543,7 @@ INDEX_HTML = """
   <!-- SEARCH BOX -->
   <div style="margin-top:12px; margin-bottom:6px;">
     <label>Search by Name:</label>
-    <input id="searchName" type="text" placeholder="Enter name to search..." oninput="renderTable()">
+    <input id="searchName" type="text" placeholder="Enter name to search..." oninput="scheduleSearch()">
   </div>
 
   <h2 style="margin-top:24px;">All Appointments</h2>
@@ -195,11 +552,19 @@ INDEX_HTML = """
 <script>
 const apiBase = "/api/appointments";
 
-async function fetchAppointments() {
-  const res = await fetch(apiBase);
-  const data = await res.json();
-  if (!data.ok) { console.error("Failed to load"); return []; }
-  return data.appointments || [];
+let apptCache = [];
+let lastEtag = null;
+
+async function loadAppointments() {
+  const headers = lastEtag ? {"If-None-Match": lastEtag} : {};
+  const res = await fetch(apiBase, {headers, cache: "no-store"});
+  if (res.status !== 304) {
+    const data = await res.json();
+    if (!data.ok) { console.error("Failed to load"); return; }
+    apptCache = data.appointments || [];
+    lastEtag = res.headers.get("ETag");
+  }
+  renderTable();
 }
 
 function formatLocal(dtIso) {
@@ -212,36 +577,48 @@ function formatLocal(dtIso) {
   }
 }
 
-async function renderTable() {
-  const appts = await fetchAppointments();
-  const searchValue = document.getElementById("searchName").value.trim().toLowerCase();
+let searchTimer = null;
 
-  const filtered = appts.filter(a => a.name.toLowerCase().includes(searchValue));
+function scheduleSearch() {
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(renderTable, 150);
+}
 
+function renderTable() {
+  const searchValue = document.getElementById("searchName").value.trim().toLowerCase();
+  const filtered = apptCache.filter(a => (a.name || "").toLowerCase().includes(searchValue));
+
+  const tableWrap = document.getElementById("tableWrap");
   if (!filtered.length) {
-    document.getElementById("tableWrap").innerHTML = "<p class='small'>No appointments found.</p>";
+    tableWrap.innerHTML = "<p class='small'>No appointments found.</p>";
     return;
   }
 
-  let html = "<table><thead><tr><th>Name</th><th>Address</th><th>Reason</th><th>Schedule</th><th class='actions'>Actions</th></tr></thead><tbody>";
+  // Build rows as DOM nodes; textContent escapes values natively
+  const frag = document.createDocumentFragment();
   for (const a of filtered) {
-    html += `<tr>
-      <td>${escapeHtml(a.name)}</td>
-      <td>${escapeHtml(a.address)}</td>
-      <td>${escapeHtml(a.reason)}</td>
-      <td>${escapeHtml(a.datetime)}</td>
-      <td class="actions">
-        <button onclick="deleteAppointment('${a.id}')">Delete</button>
-      </td>
-    </tr>`;
+    const tr = document.createElement("tr");
+    for (const value of [a.name, a.address, a.reason, a.datetime]) {
+      const td = document.createElement("td");
+      td.textContent = value || "";
+      tr.appendChild(td);
+    }
+    const actions = document.createElement("td");
+    actions.className = "actions";
+    const btn = document.createElement("button");
+    btn.textContent = "Delete";
+    btn.onclick = () => deleteAppointment(a.id);
+    actions.appendChild(btn);
+    tr.appendChild(actions);
+    frag.appendChild(tr);
   }
-  html += "</tbody></table>";
-  document.getElementById("tableWrap").innerHTML = html;
-}
 
-function escapeHtml(s) {
-  if (!s) return "";
-  return s.replaceAll("&", "&amp;").replaceAll("<", "&lt;").replaceAll(">", "&gt;");
+  const table = document.createElement("table");
+  table.innerHTML = "<thead><tr><th>Name</th><th>Address</th><th>Reason</th><th>Schedule</th><th class='actions'>Actions</th></tr></thead>";
+  const tbody = document.createElement("tbody");
+  tbody.appendChild(frag);
+  table.appendChild(tbody);
+  tableWrap.replaceChildren(table);
 }
 
 function showMessage(msg, ok=true) {
@@ -279,7 +656,7 @@ async function addAppointment() {
   if (res.status === 201) {
     showMessage("Appointment added.");
     clearForm();
-    renderTable();
+    loadAppointments();
   } else {
     const json = await res.json().catch(()=>({error:"Server error"}));
     showMessage(json.error || "Failed to add.", false);
@@ -296,19 +673,21 @@ async function deleteAppointment(id) {
   const json = await res.json();
   if (json.ok) {
     showMessage("Deleted.");
-    renderTable();
+    loadAppointments();
   } else {
     showMessage(json.error || "Failed to delete", false);
   }
 }
 
 document.addEventListener("DOMContentLoaded", () => {
-  renderTable();
+  loadAppointments();
 });
 </script>
 </body>
 </html>
 """
+# max_per_hour is a constant, so substitute it once instead of rendering per request
+INDEX_RENDERED = INDEX_HTML.replace("{{ max_per_hour }}", str(MAX_PER_HOUR))
 
 if __name__ == "__main__":
     app.run(debug=True)
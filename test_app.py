@@ -0,0 +1,42 @@
+import importlib, os, sys, tempfile, unittest
+
+
+class AppTestCase(unittest.TestCase):
+    def setUp(self):
+        # app.py loads and writes its data files relative to the working directory
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        sys.modules.pop("app", None)
+        self.app = importlib.import_module("app")
+        self.client = self.app.app.test_client()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_post_rejects_lone_surrogate(self):
+        res = self.client.post("/api/appointments", data='{"name": "Bad\\ud800", "datetime": "2030-01-01T10:00"}',
+                               content_type="application/json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(self.client.get("/api/appointments").status_code, 200)
+        self.assertEqual(self.client.get("/download").status_code, 200)
+        self.assertEqual(self.app.appointments_by_id, {})
+
+    def test_post_rejects_non_ascii_digits(self):
+        for dt in ("\u00b2024-01-01T10:00", "2024-01-01T1\u00b2:00", "\u0662\u0660\u0662\u0664-01-01T10:00"):
+            res = self.client.post("/api/appointments", json={"name": "A", "datetime": dt})
+            self.assertEqual(res.status_code, 400, dt)
+
+    def test_get_gzip_and_conditional_headers(self):
+        res = self.client.get("/api/appointments", headers={"Accept-Encoding": "gzip;q=0"})
+        self.assertIsNone(res.headers.get("Content-Encoding"))
+        res = self.client.get("/api/appointments", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(res.headers.get("Content-Encoding"), "gzip")
+        res = self.client.get("/api/appointments", headers={"If-None-Match": res.headers["ETag"]})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.headers.get("Vary"), "Accept-Encoding")
+
+
+if __name__ == "__main__":
+    unittest.main()